@@ -0,0 +1,4 @@
+"""In-process microbenchmarks for the flask_base request hot path
+
+Run with ``python -m benchmarks``, see ``python -m benchmarks --help``.
+"""
@@ -0,0 +1,115 @@
+"""Run the benchmarks and optionally compare them against a baseline
+
+    python -m benchmarks --output baseline.json
+    python -m benchmarks --compare baseline.json --threshold 0.1
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import timeit
+import traceback
+
+import flask_base
+from benchmarks.app import create_app
+from benchmarks.cases import cases
+from benchmarks.stubs import dns_stub, recaptcha_stub
+
+
+def measure(func, repeat):
+    """Return seconds per call of each repeat"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return [t / number for t in timer.repeat(repeat, number)]
+
+
+def run(keyword=None, repeat=5):
+    app = create_app()
+    results = {}
+    with recaptcha_stub(), dns_stub():
+        for name, sizes, bench in cases:
+            for size in sizes:
+                key = "%s[%d]" % (name, size)
+                if keyword and keyword not in key:
+                    continue
+                try:
+                    with bench(app, size) as func:
+                        timings = measure(func, repeat)
+                except Exception:
+                    results[key] = {"size": size, "error": traceback.format_exc()}
+                    print("%-45s error" % key, file=sys.stderr)
+                    continue
+                results[key] = {
+                    "size": size,
+                    "min_us": min(timings) * 1e6,
+                    "median_us": statistics.median(timings) * 1e6,
+                    "mean_us": statistics.mean(timings) * 1e6,
+                }
+                print(
+                    "%-45s %12.1f us" % (key, results[key]["median_us"]),
+                    file=sys.stderr,
+                )
+    return {
+        "meta": {
+            "flask_base": flask_base.__version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold):
+    """Print the median change of each benchmark, return the regressions"""
+    regressions = []
+    print("%-45s %12s %12s %8s" % ("benchmark", "baseline us", "current us", "change"))
+    for key, result in current["results"].items():
+        base = baseline["results"].get(key)
+        if not base or "median_us" not in base or "median_us" not in result:
+            continue
+        change = result["median_us"] / base["median_us"] - 1
+        flag = ""
+        if change > threshold:
+            flag = " slower"
+            regressions.append(key)
+        print(
+            "%-45s %12.1f %12.1f %+7.1f%%%s"
+            % (key, base["median_us"], result["median_us"], change * 100, flag)
+        )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("-k", "--keyword", help="only run benchmarks matching")
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument("-o", "--output", help="write results as json to file")
+    parser.add_argument("-c", "--compare", help="baseline json to compare with")
+    parser.add_argument(
+        "-t",
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative slowdown reported as a regression",
+    )
+    args = parser.parse_args(argv)
+
+    current = run(args.keyword, args.repeat)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+    elif not args.compare:
+        json.dump(current, sys.stdout, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(baseline, current, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
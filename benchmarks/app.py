@@ -0,0 +1,70 @@
+import os
+
+from marshmallow import Schema
+
+from flask_base import mmallow
+from flask_base.app import init_api
+from flask_base.base import Base
+
+os.environ.setdefault("TRUSTED_DOMAINS", "example.com")
+
+
+class ItemSchema(Schema):
+    name = mmallow.String()
+    tag = mmallow.StringTag()
+    email = mmallow.Email()
+    count = mmallow.Integer()
+    price = mmallow.Float()
+
+
+class BenchSchema:
+    class Header(Schema):
+        user_agent = mmallow.String(min_length=0)
+
+    class ViewArg(Schema):
+        bench_id = mmallow.String()
+
+    class Get:
+        class Query(Schema):
+            limit = mmallow.Integer()
+            tags = mmallow.List(mmallow.StringTag(), min_length=0)
+
+    class Post:
+        class Body(Schema):
+            name = mmallow.String(friendly_name=True)
+            items = mmallow.List(mmallow.Nested(ItemSchema), min_length=0)
+
+
+class BenchView(Base):
+    """Benchmark view"""
+
+    schema = BenchSchema
+    tags = ["bench"]
+
+    def get(self, query, header, bench_id):
+        return self.success([{"id": bench_id, "limit": query.get("limit")}])
+
+    def post(self, body, bench_id):
+        return self.success(body)
+
+
+def create_app():
+    app = init_api("benchmarks", title="benchmarks")
+    app.add_url_rule(
+        "/bench/<bench_id>", view_func=BenchView.as_view("bench")
+    )
+    return app
+
+
+def item(i):
+    return {
+        "name": "item %d" % i,
+        "tag": "tag-%d" % i,
+        "email": "user%d@example.com" % i,
+        "count": i,
+        "price": i * 1.5,
+    }
+
+
+def items(size):
+    return [item(i) for i in range(size)]
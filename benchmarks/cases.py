@@ -0,0 +1,176 @@
+import itertools
+import time
+from contextlib import contextmanager
+
+from marshmallow import Schema
+
+from benchmarks.app import BenchSchema, BenchView, ItemSchema, item, items
+from flask_base import exceptions, mmallow
+from flask_base.jsonstyle import GoogleJsonStyle, encode_json
+from flask_base.schema import load_schemas
+from flask_base.swagger import generate_swagger
+
+SIZES = (1, 10, 100, 1000)
+
+cases = []
+counter = itertools.count()
+
+
+def case(name, sizes=SIZES, available=True):
+    """Register a benchmark, func(app, size) is a context yielding the callable
+
+    available is False for benchmarks of an API the installed flask-base
+    does not have, they are skipped.
+    """
+
+    def decorator(func):
+        if available:
+            cases.append((name, sizes, contextmanager(func)))
+        return func
+
+    return decorator
+
+
+@case("validate_schema.get", sizes=(1,))
+def validate_schema_get(app, size):
+    client = app.test_client()
+    yield lambda: client.get("/bench/1?limit=5&tags=a,b,c")
+
+
+@case("validate_schema.post")
+def validate_schema_post(app, size):
+    client = app.test_client()
+    payload = {"name": "bench", "items": items(size)}
+    yield lambda: client.post("/bench/1", json=payload)
+
+
+@case("validate_schema.post_invalid")
+def validate_schema_post_invalid(app, size):
+    client = app.test_client()
+    payload = {"name": "", "items": [dict(item(i), email="x") for i in range(size)]}
+    yield lambda: client.post("/bench/1", json=payload)
+
+
+@case("load_schemas")
+def load_schemas_body(app, size):
+    data = {"name": "bench", "items": items(size)}
+    with app.test_request_context("/bench/1", method="POST", json=data):
+        yield lambda: load_schemas(
+            "body", data, [BenchSchema.Post.Body], "BenchView"
+        )
+
+
+@case("GoogleJsonStyle.body")
+def google_json_style_body(app, size):
+    data = items(size)
+    view = BenchView()
+    with app.test_request_context("/bench/1?limit=5"):
+        yield lambda: GoogleJsonStyle(view, {"items": data}).body()
+
+
+@case("GoogleJsonStyle.stream", available=hasattr(GoogleJsonStyle, "stream"))
+def google_json_style_stream(app, size):
+    data = items(size)
+    view = BenchView()
+    with app.test_request_context("/bench/1?limit=5"):
+        yield lambda: b"".join(GoogleJsonStyle(view, {"items": data}).stream())
+
+
+@case("Error.response")
+def error_response(app, size):
+    errors = {"field_%d" % i: ["This field is invalid"] for i in range(size)}
+    with app.test_request_context("/bench/1", method="POST"):
+        yield lambda: exceptions.Body(errors, "BenchView").response()
+
+
+@case("generate_swagger", sizes=(1,))
+def swagger(app, size):
+    yield lambda: generate_swagger(BenchView)
+
+
+def future_timestamp(i):
+    return int(time.time()) + 3600 + i
+
+
+fields = {
+    "String": (mmallow.String, lambda i: "value %d" % i),
+    "StringTag": (mmallow.StringTag, lambda i: "tag-%d" % i),
+    "StringUniqueTag": (mmallow.StringUniqueTag, lambda i: "org/tag-%d" % i),
+    "StringSpaceTag": (mmallow.StringSpaceTag, lambda i: "space tag-%d" % i),
+    "Recaptcha": (
+        lambda: mmallow.Recaptcha("bench"),
+        lambda i: "token-%d" % next(counter),
+    ),
+    "Password": (mmallow.Password, lambda i: "Passw0rd%d" % i),
+    "Cidr": (mmallow.Cidr, lambda i: "10.%d.0.0/16" % (i % 256)),
+    "Phone": (mmallow.Phone, lambda i: "+1203555%04d" % (i % 10000)),
+    "Rrule": (mmallow.Rrule, lambda i: "FREQ=DAILY;INTERVAL=%d" % (i + 1)),
+    "ParseQueryString": (mmallow.ParseQueryString, lambda i: encode_json({"id": i})),
+    "Date": (mmallow.Date, lambda i: "2020-01-%02d" % (i % 28 + 1)),
+    "DateTime": (
+        mmallow.DateTime,
+        lambda i: "2020-01-%02dT10:00:00+00:00" % (i % 28 + 1),
+    ),
+    "Domain": (mmallow.Domain, lambda i: "host%d.example.com" % i),
+    "Email": (mmallow.Email, lambda i: "user%d@example.com" % i),
+    "Url": (mmallow.Url, lambda i: "https://example.com/%d" % i),
+    "Dict": (mmallow.Dict, lambda i: {"key": i}),
+    "JsonSchema": (
+        mmallow.JsonSchema,
+        lambda i: {"type": "object", "properties": {"id": {"type": "integer"}}},
+    ),
+    "Username": (mmallow.Username, lambda i: "user%d@example.com" % i),
+    "Boolean": (mmallow.Boolean, lambda i: bool(i % 2)),
+    "Integer": (mmallow.Integer, lambda i: i + 1),
+    "FutureTimestamp": (mmallow.FutureTimestamp, future_timestamp),
+    "Float": (mmallow.Float, lambda i: i * 1.5),
+    "Nested": (lambda: mmallow.Nested(ItemSchema), item),
+    "DynamicNested": (
+        lambda: mmallow.DynamicNested(ItemSchema, mmallow.String()),
+        lambda i: {"key-%d" % i: item(i)},
+    ),
+    "StringFunction": (
+        lambda: mmallow.StringFunction(deserialize=str.upper),
+        lambda i: "value %d" % i,
+    ),
+    "DictFunction": (lambda: mmallow.DictFunction(deserialize=dict), item),
+    "NestFunction": (
+        lambda: mmallow.NestFunction(ItemSchema, deserialize=dict),
+        item,
+    ),
+}
+
+# fields too slow by design to run at every size
+field_sizes = {"Password": (1,), "Recaptcha": (1, 10)}
+
+
+# fields reading their own attribute name, loaded as one field per value
+flat_fields = {"ParseQueryString"}
+
+
+def field_case(name, field, value):
+    def bench(app, size):
+        if name in flat_fields:
+            schema = Schema.from_dict({"v%d" % i: field() for i in range(size)})()
+
+            def load():
+                return schema.load({"v%d" % i: value(i) for i in range(size)})
+
+        else:
+            schema = Schema.from_dict(
+                {"values": mmallow.List(field(), min_length=0, max_length=10**6)}
+            )()
+
+            def load():
+                return schema.load({"values": [value(i) for i in range(size)]})
+
+        with app.test_request_context("/bench/1", method="POST"):
+            yield load
+
+    return bench
+
+
+for name, (field, value) in fields.items():
+    case("mmallow." + name, sizes=field_sizes.get(name, SIZES))(
+        field_case(name, field, value)
+    )
@@ -0,0 +1,81 @@
+"""Measure the import time and memory of flask_base modules
+
+    python -m benchmarks.imports
+    python -m benchmarks.imports --module flask_base.mmallow --repeat 5
+
+Every measurement runs in a fresh interpreter with -X importtime. The
+"eager" row also imports the optional validator dependencies up front,
+which is what importing flask_base.mmallow used to cost.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+validator_dependencies = [
+    "bcrypt",
+    "dateutil.parser",
+    "dateutil.rrule",
+    "emoji",
+    "jsonschema",
+    "netaddr",
+    "phonenumbers",
+    "regex",
+    "requests",
+    "validators",
+]
+
+script = """
+import resource, sys
+{imports}
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, file=sys.stderr)
+"""
+
+
+def measure(imports):
+    """Return total import microseconds and max rss kilobytes of imports"""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script.format(imports=imports)],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr.splitlines()
+    total = 0
+    for line in output[:-1]:
+        # import time: self [us] | cumulative | imported package
+        if line.startswith("import time:") and "|" in line:
+            self_us = line.split(":", 1)[1].split("|")[0].strip()
+            if self_us.isdigit():
+                total += int(self_us)
+    return total, int(output[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.imports")
+    parser.add_argument("-m", "--module", default="flask_base.mmallow")
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    cases = {
+        "lazy": "import %s" % args.module,
+        "eager": "import %s\nimport %s" % (args.module, ", ".join(validator_dependencies)),
+    }
+    results = {}
+    for name, imports in cases.items():
+        runs = [measure(imports) for _ in range(args.repeat)]
+        results[name] = {
+            "import_us": statistics.median(run[0] for run in runs),
+            "max_rss_kb": statistics.median(run[1] for run in runs),
+        }
+        print(
+            "%-6s %10.0f us %10.0f kb"
+            % (name, results[name]["import_us"], results[name]["max_rss_kb"]),
+            file=sys.stderr,
+        )
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
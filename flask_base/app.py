@@ -1,10 +1,13 @@
 from flask_base.exceptions import Error
 from werkzeug.middleware.proxy_fix import ProxyFix
+import click
 from flask_cors import CORS
 from flask import Flask, redirect
 from flasgger import Swagger, LazyJSONEncoder
 from apispec.ext.marshmallow import openapi
 
+from flask_base.swagger import export_swagger, swagger_view
+from flask_base.timing import init_timing
 from flask_base.utils import OpenAPIConverter2
 
 openapi.OpenAPIConverter = OpenAPIConverter2
@@ -30,6 +33,20 @@ def init_api(
     origins="*",
     flask_vars=None,
     index_docs=True,
+    api_docs=True,
+    apidocs_snapshot=None,
+    json_backend="auto",
+    json_indent=None,
+    cursor_compression="zlib",
+    cursor_secret=None,
+    cursor_max_size=4096,
+    cursor_dictionary=None,
+    validation_fail_fast=False,
+    max_body_size=None,
+    max_json_depth=None,
+    max_json_keys=None,
+    server_timing=False,
+    timing_hook=None,
 ):
     # create an application instance.
     app = Flask(name, instance_relative_config=True, subdomain_matching=True)
@@ -44,6 +61,24 @@ def init_api(
             origins = [origins]
     CORS(app, origins=origins, supports_credentials=supports_credentials)
 
+    # json backend, "auto" uses orjson when installed, indent only in debug
+    app.config["JSON_BACKEND"] = json_backend
+    app.config["JSON_INDENT"] = json_indent
+
+    # pagination cursors, signed when a secret or CURSOR_SECRET env is set
+    app.config["CURSOR_COMPRESSION"] = cursor_compression
+    app.config["CURSOR_SECRET"] = cursor_secret
+    app.config["CURSOR_MAX_SIZE"] = cursor_max_size
+    app.config["CURSOR_DICTIONARY"] = cursor_dictionary
+
+    # stop validating at the first error, views override with fail_fast
+    app.config["VALIDATION_FAIL_FAST"] = validation_fail_fast
+
+    # request body limits checked before parsing, views override them
+    app.config["MAX_BODY_SIZE"] = max_body_size
+    app.config["MAX_JSON_DEPTH"] = max_json_depth
+    app.config["MAX_JSON_KEYS"] = max_json_keys
+
     # load flask environment in app
     flask_vars = flask_vars or {}
     translate = {"True": True, "False": False, "None": None}
@@ -51,21 +86,42 @@ def init_api(
         if k.startswith("FLASK_"):
             app.config[k.replace("FLASK_", "")] = translate.get(v, v)
 
+    # time request phases, sent as Server-Timing and/or passed to timing_hook
+    if server_timing or timing_hook:
+        init_timing(app, header=server_timing, hook=timing_hook)
+
     # handle error
     @app.errorhandler(Error)
     def handle_client_error(error):
         return error.response()
 
-    # init swagger
-    app.config["SWAGGER"] = dict(title=title, uiversion=uiversion)
-    app.json_encoder = LazyJSONEncoder
-    swagger_config = {"specs_route": "/apidocs"}
-    Swagger(app, config=swagger_config, merge=True)
+    # init swagger, view docs are generated when first requested
+    if api_docs:
+        app.config["SWAGGER"] = dict(title=title, uiversion=uiversion)
+        app.json_encoder = LazyJSONEncoder
+        swagger_config = {"specs_route": "/apidocs"}
+        Swagger(app, config=swagger_config, merge=True, decorators=[swagger_view])
 
-    if index_docs:
+        # serve docs from a snapshot written by "flask export-apidocs"
+        app.config["SWAGGER_SNAPSHOT"] = apidocs_snapshot
+
+        @app.cli.command("export-apidocs")
+        @click.argument("path")
+        def export_apidocs(path):
+            """Write the api docs of every view to a snapshot file"""
+            click.echo(export_swagger(app, path))
+
+    if api_docs and index_docs:
 
         @app.route("/")
         def index():
             return redirect("/apidocs")
 
     return app
+
+
+def asgi_app(app):
+    """Wrap an init_api app for ASGI servers, requires flask[async]"""
+    from asgiref.wsgi import WsgiToAsgi
+
+    return WsgiToAsgi(app)
@@ -1,12 +1,13 @@
 import os
 
-from flask import make_response
+from flask import make_response, stream_with_context
 from flask.views import MethodView
 
 from flask_base.exceptions import Error
 from flask_base.jsonstyle import GoogleJsonStyle
 from flask_base.schema import validate_schema
-from flask_base.swagger import generate_swagger
+from flask_base.swagger import register_swagger
+from flask_base.timing import phase
 from flask_base.utils import generate_cookie
 
 
@@ -32,15 +33,20 @@ class Base(MethodView):
             )
         )
 
-    def success(self, data=None, msg=None):
-        if isinstance(data, list):
+    def success(self, data=None, msg=None, stream=False):
+        if isinstance(data, list) or (stream and not isinstance(data, dict)):
             data = {"items": data}
         style = GoogleJsonStyle(self, data, msg)
-        response = make_response(style.body())
+        with phase("serialize"):
+            if stream:
+                response = make_response(stream_with_context(style.stream()))
+            else:
+                response = make_response(style.body())
         response.status_code = style.status_code()
         response.headers["Content-Type"] = style.content_type()
-        for cookie in self.cookies:
-            response.set_cookie(**cookie)
+        with phase("cookies"):
+            for cookie in self.cookies:
+                response.set_cookie(**cookie)
         return response
 
     @staticmethod
@@ -49,8 +55,8 @@ class Base(MethodView):
 
     @classmethod
     def as_view(cls, name, *class_args, **class_kwargs):
-        _cls = generate_swagger(cls) if generate_swagger else cls
-        view_func = super(Base, _cls).as_view(name, *class_args, **class_kwargs)
+        register_swagger(cls)
+        view_func = super(Base, cls).as_view(name, *class_args, **class_kwargs)
         for decorator in [validate_schema] + cls.pre_decorators:
             if decorator:
                 view_func2 = decorator(view_func)
@@ -63,6 +69,13 @@ class Base(MethodView):
         return view_func
 
 
+class AsyncBase(Base):
+    """Base whose handlers may be async def, validators doing I/O such as
+    Recaptcha and Domain are awaited concurrently after the schemas load"""
+
+    async_validation = True
+
+
 class BaseV2(MethodView):
     pre_decorators = []
 
@@ -85,15 +98,20 @@ class BaseV2(MethodView):
             )
         )
 
-    def success(self, data=None, msg=None):
-        if isinstance(data, list):
+    def success(self, data=None, msg=None, stream=False):
+        if isinstance(data, list) or (stream and not isinstance(data, dict)):
             data = {"items": data}
         style = GoogleJsonStyle(self, data, msg)
-        response = make_response(style.body())
+        with phase("serialize"):
+            if stream:
+                response = make_response(stream_with_context(style.stream()))
+            else:
+                response = make_response(style.body())
         response.status_code = style.status_code()
         response.headers["Content-Type"] = style.content_type()
-        for cookie in self.cookies:
-            response.set_cookie(**cookie)
+        with phase("cookies"):
+            for cookie in self.cookies:
+                response.set_cookie(**cookie)
         return response
 
     @staticmethod
@@ -1,4 +1,6 @@
-from flask import jsonify
+from flask import current_app
+
+from flask_base.jsonstyle import encode
 
 
 class Error(Exception):
@@ -37,7 +39,9 @@ class Error(Exception):
         return output
 
     def response(self):
-        response = jsonify(self.to_dict())
+        response = current_app.response_class(
+            encode(self.to_dict()), mimetype="application/json"
+        )
         response.status_code = self.status_code
         return response
 
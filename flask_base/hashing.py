@@ -0,0 +1,99 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+
+from flask_base.exceptions import Error
+from flask_base.utils import LazyModule
+
+bcrypt = LazyModule("bcrypt")
+
+# list collecting PendingHash of deferred Password fields, set while loading
+pending_hashes = ContextVar("pending_hashes", default=None)
+
+default_password_hasher = None
+
+
+class PendingHash:
+    """Password whose hash is computed once the whole request validated
+
+    Post validate hooks see the PendingHash in place of the hash.
+    """
+
+    __slots__ = ("password", "rounds", "future")
+
+    def __init__(self, password, rounds):
+        self.password = password
+        self.rounds = rounds
+        self.future = None
+
+
+class PasswordHasher:
+    """Hash passwords with bcrypt on a bounded thread pool
+
+    bcrypt releases the GIL while hashing, so hashes run in parallel on
+    workers threads without starving the request threads. At most
+    workers + queue_size hashes are in flight, a caller waits up to wait
+    seconds for a slot before the request is rejected with a 503. The
+    defaults come from the BCRYPT_WORKERS, BCRYPT_QUEUE_SIZE and
+    BCRYPT_QUEUE_WAIT environment variables.
+    """
+
+    def __init__(self, workers=None, queue_size=None, wait=None):
+        if workers is None:
+            workers = os.environ.get("BCRYPT_WORKERS", os.cpu_count() or 2)
+        workers = int(workers)
+        if queue_size is None:
+            queue_size = os.environ.get("BCRYPT_QUEUE_SIZE", workers * 4)
+        if wait is None:
+            wait = os.environ.get("BCRYPT_QUEUE_WAIT", 5)
+        self.wait = float(wait)
+        self.slots = threading.BoundedSemaphore(workers + int(queue_size))
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="bcrypt")
+
+    @staticmethod
+    def hashpw(password, rounds):
+        return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode()
+
+    def submit(self, password, rounds=12):
+        """Return a future of the password hash"""
+        if not self.slots.acquire(timeout=self.wait):
+            raise Error(
+                "Server is busy, try again later", 503, error_type="ServerBusyException"
+            )
+        try:
+            future = self.executor.submit(self.hashpw, password, rounds)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    def hash(self, password, rounds=12):
+        return self.submit(password, rounds).result()
+
+
+def password_hasher():
+    """Return the shared hasher, created on first use"""
+    global default_password_hasher
+    if default_password_hasher is None:
+        default_password_hasher = PasswordHasher()
+    return default_password_hasher
+
+
+def replace_pending(data):
+    if isinstance(data, PendingHash):
+        return data.future.result()
+    if isinstance(data, dict):
+        for key, value in data.items():
+            data[key] = replace_pending(value)
+    elif isinstance(data, list):
+        data[:] = [replace_pending(value) for value in data]
+    return data
+
+
+def hash_pending(data, pending):
+    """Hash pending passwords concurrently and put the hashes in data"""
+    for item in pending:
+        item.future = password_hasher().submit(item.password, item.rounds)
+    return replace_pending(data)
@@ -1,24 +1,294 @@
+import base64
+import hashlib
+import hmac
 import json
-from collections import OrderedDict
+import os
+import zlib
+from collections import Counter, OrderedDict
+from collections.abc import Sized
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from functools import lru_cache
 
-from flask import request
+import simplejson
+from flask import current_app, has_app_context, request
 from werkzeug.urls import iri_to_uri
-import base64
-from py_tools.format import dumps
-import gzip
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# first byte of a cursor, how the json after it is compressed
+cursor_formats = {"none": 0, "zlib": 1, "zdict": 2}
+cursor_signature_size = 16
+# base64 of the gzip magic bytes, cursors written before the codec existed
+legacy_cursor_prefix = "H4sI"
+
+
+class CursorError(ValueError):
+    pass
+
+
+class CursorCodec:
+    """Encode pagination keys to short url safe cursors
+
+    compression is "none", "zlib" or "zdict" (zlib with a preset dictionary,
+    see train_cursor_dictionary). With a secret every cursor carries an
+    HMAC and unsigned cursors are rejected. Decoding never inflates more
+    than max_size bytes, recently decoded cursors skip decompression.
+    """
+
+    def __init__(
+        self,
+        compression="zlib",
+        level=6,
+        secret=None,
+        max_size=4096,
+        dictionary=None,
+        cache_size=1024,
+    ):
+        if compression not in cursor_formats:
+            raise ValueError("Unknown cursor compression: %s" % compression)
+        if compression == "zdict" and not dictionary:
+            raise ValueError("zdict cursor compression requires a dictionary")
+        if isinstance(secret, str):
+            secret = secret.encode()
+        if isinstance(dictionary, str):
+            dictionary = dictionary.encode()
+        self.compression = compression
+        self.level = level
+        self.secret = secret
+        self.max_size = max_size
+        self.dictionary = dictionary
+        # json of recently decoded cursors, a page is often requested again
+        self.decoded = lru_cache(maxsize=cache_size)(self.decode_bytes)
+
+    def sign(self, payload):
+        return hmac.new(self.secret, payload, hashlib.sha256).digest()[
+            :cursor_signature_size
+        ]
+
+    def compress(self, data):
+        if self.compression == "none":
+            return data
+        if self.compression == "zlib":
+            return zlib.compress(data, self.level)
+        compressor = zlib.compressobj(self.level, zdict=self.dictionary)
+        return compressor.compress(data) + compressor.flush()
+
+    def decompress(self, data, fmt):
+        if fmt == cursor_formats["none"]:
+            if len(data) > self.max_size:
+                raise CursorError("Cursor is too large")
+            return data
+        if fmt == cursor_formats["zdict"] and self.dictionary:
+            decompressor = zlib.decompressobj(zdict=self.dictionary)
+        elif fmt == cursor_formats["zlib"]:
+            decompressor = zlib.decompressobj()
+        elif fmt == "gzip":
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        else:
+            raise CursorError("Unknown cursor format")
+        try:
+            # inflate at most one byte past the limit to detect larger data
+            data = decompressor.decompress(data, self.max_size + 1)
+        except zlib.error as e:
+            raise CursorError("Invalid cursor") from e
+        if len(data) > self.max_size or decompressor.unconsumed_tail:
+            raise CursorError("Cursor is too large")
+        return data
+
+    def encode(self, data):
+        """Return the cursor of data"""
+        payload = bytes([cursor_formats[self.compression]]) + self.compress(
+            json_encoder("json")(data)
+        )
+        if self.secret:
+            payload += self.sign(payload)
+        return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+    def decode_bytes(self, cursor):
+        """Return the json bytes of cursor"""
+        if cursor.startswith(legacy_cursor_prefix):
+            if self.secret:
+                raise CursorError("Cursor is not signed")
+            fmt = "gzip"
+        else:
+            fmt = None
+        try:
+            payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        except (ValueError, TypeError) as e:
+            raise CursorError("Invalid cursor") from e
+        if fmt is None:
+            if self.secret:
+                signature = payload[-cursor_signature_size:]
+                payload = payload[:-cursor_signature_size]
+                if not payload or not hmac.compare_digest(
+                    signature, self.sign(payload)
+                ):
+                    raise CursorError("Cursor signature does not match")
+            if not payload:
+                raise CursorError("Invalid cursor")
+            fmt, payload = payload[0], payload[1:]
+        return self.decompress(payload, fmt)
+
+    def decode(self, cursor):
+        """Return the data of cursor"""
+        data = self.decoded(cursor)
+        try:
+            return orjson.loads(data) if orjson else json.loads(data)
+        except ValueError as e:
+            raise CursorError("Invalid cursor") from e
+
+
+def train_cursor_dictionary(samples, size=1024):
+    """Build a zdict cursor dictionary from sample pagination keys"""
+    fragments = Counter()
+    for sample in samples:
+        encoded = json_encoder("json")(sample).decode()
+        fragments.update(part + "," for part in encoded.strip("{}").split(","))
+    dictionary = b""
+    for fragment, _ in fragments.most_common():
+        fragment = fragment.encode()
+        if len(dictionary) + len(fragment) > size:
+            break
+        # zlib favours the end of the dictionary, most common goes last
+        dictionary = fragment + dictionary
+    return dictionary
+
+
+@lru_cache(maxsize=None)
+def cursor_codec(
+    compression="zlib", level=6, secret=None, max_size=4096, dictionary=None
+):
+    """Return the shared codec of the given options"""
+    return CursorCodec(compression, level, secret, max_size, dictionary)
+
+
+def app_cursor_codec():
+    """Return the cursor codec configured on the current app"""
+    if not has_app_context():
+        return cursor_codec(secret=os.environ.get("CURSOR_SECRET"))
+    codec = current_app.extensions.get("cursor_codec")
+    if codec is None:
+        config = current_app.config
+        codec = cursor_codec(
+            config.get("CURSOR_COMPRESSION", "zlib"),
+            int(config.get("CURSOR_LEVEL", 6)),
+            config.get("CURSOR_SECRET") or os.environ.get("CURSOR_SECRET"),
+            int(config.get("CURSOR_MAX_SIZE", 4096)),
+            config.get("CURSOR_DICTIONARY"),
+        )
+        current_app.extensions["cursor_codec"] = codec
+    return codec
+
 
 def encode_json(data):
-    json_string = json.dumps(data, separators=(',', ':'))
-    compressed_data = gzip.compress(json_string.encode())
-    base64_url_safe = base64.urlsafe_b64encode(compressed_data).decode()
-    return base64_url_safe
+    """Encode a pagination key to a cursor"""
+    return app_cursor_codec().encode(data)
+
 
 def decode_json(data):
-    decoded_bytes = base64.urlsafe_b64decode(data.encode())
-    decoded_bytes = gzip.decompress(decoded_bytes)
-    decoded_json_data = decoded_bytes.decode()
-    original_data = json.loads(decoded_json_data)
-    return original_data
+    """Decode a cursor made by encode_json"""
+    return app_cursor_codec().decode(data)
+
+
+def decimal_number(obj):
+    """Return the int or float of the same value as obj, TypeError if none"""
+    if obj.is_finite():
+        text = str(obj)
+        if "." not in text and "E" not in text:
+            return int(obj)
+        number = float(obj)
+        if Decimal(repr(number)) == obj:
+            return number
+    raise TypeError("Decimal %s has no exact float" % obj)
+
+
+def json_default(obj):
+    """Encode types the json backends do not support natively"""
+    if isinstance(obj, Decimal):
+        # the simplejson encoder writes the other decimals exactly
+        return decimal_number(obj)
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if hasattr(obj, "_asdict"):
+        # namedtuples are objects
+        return obj._asdict()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode()
+    if isinstance(obj, Enum):
+        return obj.value
+    return str(obj)
+
+
+def simplejson_encoder(indent=None):
+    options = {
+        "default": json_default,
+        "ensure_ascii": False,
+        "use_decimal": True,
+        "ignore_nan": True,
+    }
+    if indent:
+        encoder = simplejson.JSONEncoder(indent=indent, **options)
+    else:
+        encoder = simplejson.JSONEncoder(separators=(",", ":"), **options)
+    return lambda data: encoder.encode(data).encode()
+
+
+def orjson_encoder(indent=None):
+    # dataclasses go through json_default like with the simplejson encoder
+    option = (
+        orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    fallback = simplejson_encoder(indent)
+
+    def encode(data):
+        try:
+            return orjson.dumps(data, default=json_default, option=option)
+        except orjson.JSONEncodeError:
+            # ints over 64 bits, inexact decimals and the like
+            return fallback(data)
+
+    return encode
+
+
+json_backends = {"json": simplejson_encoder, "orjson": orjson_encoder}
+
+
+@lru_cache(maxsize=None)
+def json_encoder(backend="auto", indent=None):
+    """Return a function encoding data to json bytes"""
+    if backend == "auto":
+        backend = "orjson" if orjson else "json"
+    if backend == "orjson" and orjson is None:
+        raise ImportError("orjson json backend requires the orjson package")
+    return json_backends[backend](indent)
+
+
+def app_json_encoder():
+    """Return the json encoder configured on the current app"""
+    indent = current_app.config.get("JSON_INDENT")
+    if indent is None and current_app.debug:
+        indent = 3
+    return json_encoder(
+        current_app.config.get("JSON_BACKEND", "auto"),
+        int(indent) if indent else None,
+    )
+
+
+def encode(data):
+    """Encode data to json bytes with the backend configured on the app"""
+    return app_json_encoder()(data)
+
 
 class GoogleJsonStyle:
     def __init__(self, parent, data, msg=None):
@@ -95,7 +365,41 @@ class GoogleJsonStyle:
         body = OrderedDict(body)
         if "items" in body:
             body["items"] = body.pop("items")
-        body = dumps({"data": body}, indent=3)
+        body = encode({"data": body})
         if request.args.get("callback") and request.method == "GET":
-            body = "{}({});".format(request.args.get("callback"), body)
+            body = b"%s(%s);" % (request.args.get("callback").encode(), body)
         return body
+
+    def stream(self, chunk_items=100):
+        """Yield the body in chunks, items are encoded a few at a time"""
+        items = self.data.pop("items", None) or []
+        body = self.add_count(self.data)
+        if isinstance(items, Sized):
+            body["currentItemCount"] = len(items)
+        body = self.add_self(body)
+        body = self.add_edit_self(body)
+        body["items"] = items
+        body = self.add_next_link(body)
+        del body["items"]
+
+        callback = request.args.get("callback")
+        callback = callback if callback and request.method == "GET" else None
+
+        # reopen the encoded envelope to append items last
+        encode_item = app_json_encoder()
+        head = encode_item(body).rstrip()[:-1]
+        if body:
+            head += b","
+        chunk = [b"%s(" % callback.encode()] if callback else []
+        chunk.append(b'{"data":' + head + b'"items":[')
+        for index, item in enumerate(items):
+            if index:
+                chunk.append(b",")
+            chunk.append(encode_item(item))
+            if len(chunk) >= chunk_items * 2:
+                yield b"".join(chunk)
+                chunk = []
+        chunk.append(b"]}}")
+        if callback:
+            chunk.append(b");")
+        yield b"".join(chunk)
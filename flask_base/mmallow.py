@@ -1,25 +1,54 @@
+import asyncio
+import hashlib
+import json
+import math
 import os
 import re
+from array import array
+from collections.abc import Mapping
+from contextvars import ContextVar
+from functools import lru_cache, partial
 from urllib.parse import parse_qs
 
-import bcrypt
-import dateutil.parser
-import phonenumbers
-import requests
-import validators
-from dateutil.rrule import rrulestr
-from jsonschema import Draft7Validator
-from marshmallow import fields, validate, INCLUDE
+from marshmallow import fields, validate, INCLUDE, ValidationError
 from more_itertools import unique_everseen
-from netaddr import IPNetwork
-from netaddr.core import AddrFormatError
-import socket
+from flask_base.hashing import PendingHash, password_hasher, pending_hashes
 from flask_base.jsonstyle import decode_json
 from flask_base.swagger import mm_plugin
+from flask_base.utils import LazyModule, TTLCache
+from flask_base.verifiers import domain_resolver, recaptcha_verifier
 import traceback
 from datetime import datetime, timezone
-import emoji
-import regex
+
+# validator dependencies, imported the first time a field uses them
+dateutil_parser = LazyModule("dateutil.parser")
+dateutil_rrule = LazyModule("dateutil.rrule")
+emoji = LazyModule("emoji")
+jsonschema = LazyModule("jsonschema")
+netaddr = LazyModule("netaddr")
+phonenumbers = LazyModule("phonenumbers")
+regex = LazyModule("regex")
+validators = LazyModule("validators")
+
+# list collecting (key, coroutine function) of validators doing I/O, set
+# while loading for async views so they can be awaited after the load
+deferred_checks = ContextVar("deferred_checks", default=None)
+# dict of awaited validator results by key, the ValidationError or None, set
+# while loading again to report failures like synchronous validation does
+deferred_results = ContextVar("deferred_results", default=None)
+# list collecting (attr, messages) of failed fields, set while loading in
+# fail fast mode so fields after the first error skip their work
+fail_fast_errors = ContextVar("fail_fast_errors", default=None)
+# dict of parsed datetimes by value, set while loading so paired start and
+# end fields parse each value once per load
+parsed_dates = ContextVar("parsed_dates", default=None)
+
+# fields whose validation depends only on the value, see enable_memo
+memoizable_fields = ["Cidr", "Email", "Phone", "Rrule", "Url", "Username"]
+# TTLCache of validator results per field name
+validator_memos = {}
+# Draft7Validator of checked json schemas by canonical hash, None if invalid
+checked_jsonschemas = TTLCache(1024)
 
 friendly_allowed_chars = [" ", "&", "'", "-", "_", "(", ")", ".", "/"]
 
@@ -123,12 +152,26 @@ def find_replace_all(str, replace_str, allowed_chars):
     return str
 
 
+@lru_cache(maxsize=None)
+def ascii_friendly_pattern(allowed_chars):
+    """Return a pattern matching ascii input is_valid_friendly_input accepts"""
+    # no ascii character is an emoji, and in ascii only "\r\n" is a
+    # grapheme of more than one character
+    chars = sorted({c for c in allowed_chars if len(c) == 1 and c.isascii()})
+    return re.compile("[A-Za-z0-9%s]*" % "".join(re.escape(c) for c in chars))
+
+
 def is_valid_friendly_input(s, allowed_chars=None) -> bool:
     allow_emoji = False
     if allowed_chars is None or len(allowed_chars) == 0:
         allow_emoji = True
         allowed_chars = allowed_chars or friendly_allowed_chars
 
+    if s.isascii() and "\r" not in s:
+        if not isinstance(allowed_chars, str):
+            allowed_chars = tuple(allowed_chars)
+        return ascii_friendly_pattern(allowed_chars).fullmatch(s) is not None
+
     # Use grapheme clusters
     for grapheme in regex.findall(r"\X", s):
         if grapheme.isalnum() or grapheme in allowed_chars:
@@ -140,6 +183,74 @@ def is_valid_friendly_input(s, allowed_chars=None) -> bool:
     return True
 
 
+def defer_check(func, *args):
+    """Defer an async validator when loading for an async view
+
+    Return True if the validator is deferred or already passed, raise its
+    error if it already failed.
+    """
+    key = (func, args)
+    results = deferred_results.get()
+    if results is not None and key in results:
+        if results[key] is not None:
+            raise results[key]
+        return True
+    checks = deferred_checks.get()
+    if checks is None:
+        return False
+    checks.append((key, partial(func, *args)))
+    return True
+
+
+def enable_memo(*names, maxsize=4096):
+    """Memoize the validator results of the named fields, all by default"""
+    for name in names or memoizable_fields:
+        if name not in memoizable_fields:
+            raise ValueError("%s validation cannot be memoized" % name)
+        validator_memos[name] = TTLCache(maxsize)
+
+
+def disable_memo(*names):
+    for name in names or memoizable_fields:
+        validator_memos.pop(name, None)
+
+
+def memo_stats():
+    """Return hits, misses and size of each enabled memo"""
+    return {
+        name: {"hits": memo.hits, "misses": memo.misses, "size": len(memo)}
+        for name, memo in validator_memos.items()
+    }
+
+
+def memoize(name, func, *args):
+    """Return func(*args), from the memo of name when enabled
+
+    Only returned results are memoized, an exception is raised again for
+    the next call with the same arguments.
+    """
+    memo = validator_memos.get(name)
+    if memo is None:
+        return func(*args)
+    result = memo.get(args, memo.missing)
+    if result is memo.missing:
+        result = func(*args)
+        memo.set(args, result)
+    return result
+
+
+# MMALLOW_MEMO is "all" or field names separated by commas
+if os.environ.get("MMALLOW_MEMO"):
+    enable_memo(
+        *[
+            name.strip()
+            for name in os.environ["MMALLOW_MEMO"].split(",")
+            if name.strip() != "all"
+        ],
+        maxsize=int(os.environ.get("MMALLOW_MEMO_SIZE", 4096)),
+    )
+
+
 def error_msg(field):
     if os.environ.get("MMALLOW_ERROR_EXPAND", "true") == "true":
         return field[1]
@@ -167,10 +278,30 @@ def validate_phone(value, min_length=None):
         return phonenumbers.format_number(
             input_number, phonenumbers.PhoneNumberFormat.E164
         )
-    except BaseException:
+    except Exception:
         return
 
 
+def validate_cidr(value):
+    try:
+        netaddr.IPNetwork(value)
+        return True
+    except netaddr.AddrFormatError:
+        return False
+
+
+def validate_rrule(value):
+    try:
+        dateutil_rrule.rrulestr(value)
+        return True
+    except Exception:
+        return False
+
+
+def validate_url(value):
+    return bool(validators.url(value))
+
+
 def validate_username(value, min_length=None):
     if "@" in value and "." in value:
         return validate_email(value, min_length), "email"
@@ -206,28 +337,54 @@ def date_time(
                 date,
             )
             if start_date > end_date:
-                if date:
-                    self.error_messages["validator_failed"] = error_msg(
-                        FIELD_START_END_DATE
-                    )
-                else:
-                    self.error_messages["validator_failed"] = error_msg(
-                        FIELD_START_END_DATETIME
-                    )
-                raise BaseException
+                raise self.make_error("start_end_validator_failed")
 
         return dt.isoformat() if iso_format else dt
 
-    except BaseException:
-        traceback.print_exc()
+    except (KeyError, TypeError, ValueError, OverflowError):
         raise self.make_error("validator_failed")
 
 
+# the strict ISO 8601 forms datetime.fromisoformat reads like dateutil
+iso_datetime_pattern = re.compile(
+    r"\d{4}-\d{2}-\d{2}"
+    r"([T ]\d{2}:\d{2}(:\d{2}(\.\d{1,6})?)?(Z|[+-]\d{2}:\d{2})?)?"
+)
+
+
+@lru_cache(maxsize=4096)
+def parse_iso(value):
+    """Parse an ISO 8601 value with the standard library, None if invalid"""
+    try:
+        return datetime.fromisoformat(value).replace(microsecond=0)
+    except ValueError:
+        return None
+
+
+def parse_value(value):
+    """Parse value with the standard library, dateutil for other formats
+
+    dateutil results are memoized only for the current load, missing parts
+    are taken from today.
+    """
+    if iso_datetime_pattern.fullmatch(value):
+        dt = parse_iso(value)
+        if dt is not None:
+            return dt
+    parsed = parsed_dates.get()
+    if parsed is None:
+        return dateutil_parser.parse(value).replace(microsecond=0)
+    dt = parsed.get(value)
+    if dt is None:
+        dt = parsed[value] = dateutil_parser.parse(value).replace(microsecond=0)
+    return dt
+
+
 def parse_datetime(value, date):
-    dt = dateutil.parser.parse(value).replace(microsecond=0)
+    dt = parse_value(value)
 
     if not date and dt.tzinfo is None:
-        raise BaseException
+        raise ValueError("Datetime has no timezone")
 
     return dt
 
@@ -271,7 +428,26 @@ def default_error_messages():
     )
 
 
-class Fields:
+class FailFast:
+    """Record the first error of a fail fast load, skip the fields after it
+
+    Wraps deserialize, so required, null and type errors are recorded too.
+    """
+
+    def deserialize(self, value, attr=None, data=None, **kwargs):
+        failed = fail_fast_errors.get()
+        if failed:
+            # the load already failed, its result is never used
+            return value
+        try:
+            return super(FailFast, self).deserialize(value, attr, data, **kwargs)
+        except ValidationError as error:
+            if failed is not None:
+                failed.append((attr, error.messages))
+            raise
+
+
+class Fields(FailFast):
     def _serialize(self, value, attr, obj, **kwargs):
         for method in [
             "main_deserialize",
@@ -393,8 +569,13 @@ class StringSpaceTag(String):
 
 
 class Recaptcha(String):
-    def __init__(self, action, *args, **kwargs):
+    # RecaptchaVerifier used by every Recaptcha field, defaults to the shared one
+    verifier = None
+
+    def __init__(self, action, *args, verifier=None, **kwargs):
         self.action = action
+        if verifier is not None:
+            self.verifier = verifier
         kwargs.setdefault("error_messages", default_error_messages())
         super(Recaptcha, self).__init__(*args, **kwargs)
         self.error_messages["validator_failed"] = error_msg(FIELD_RECAPTCHA)
@@ -402,10 +583,18 @@ class Recaptcha(String):
     def post_deserialize(self, value, attr, obj, **kwargs):
         if value == os.environ["RECAPTCHA_SECRET_TEST"]:
             return True
-        r = requests.post(
-            "https://www.google.com/recaptcha/api/siteverify",
-            data={"secret": os.environ["RECAPTCHA_SECRET"], "response": value},
-        ).json()
+        if defer_check(self.async_post_deserialize, value):
+            return True
+        return self.verify(self.siteverify(value))
+
+    async def async_post_deserialize(self, value):
+        return self.verify(await asyncio.to_thread(self.siteverify, value))
+
+    def siteverify(self, value):
+        verifier = self.verifier or recaptcha_verifier()
+        return verifier.siteverify(value, os.environ["RECAPTCHA_SECRET"])
+
+    def verify(self, r):
         if not r.get("success", False):
             raise self.make_error("validator_failed")
         if r.get("action", "") != self.action:
@@ -416,16 +605,27 @@ class Recaptcha(String):
 
 
 class Password(String):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, rounds=None, defer_hash=False, **kwargs):
         regex = r"^(?=.*[a-z])(?=.*[A-Z])(?=.*\d).{8,}$"
         self.regex = re.compile(regex, 0) if isinstance(regex, (str, bytes)) else regex
+        self.rounds = int(rounds or os.environ.get("BCRYPT_ROUNDS", 12))
+        # hash only once every location of the request validated
+        self.defer_hash = defer_hash
         super(Password, self).__init__(*args, **kwargs)
         self.error_messages["validator_failed"] = error_msg(FIELD_PASSWORD)
 
     def post_deserialize(self, value, attr, obj, **kwargs):
         if self.regex.match(value) is None:
             raise self.make_error("validator_failed")
-        return bcrypt.hashpw(value.encode("utf-8"), bcrypt.gensalt()).decode()
+        if deferred_results.get() is not None:
+            # loading again only to report errors, the hash is never used
+            return value
+        pending = pending_hashes.get()
+        if self.defer_hash and pending is not None:
+            value = PendingHash(value, self.rounds)
+            pending.append(value)
+            return value
+        return password_hasher().hash(value, self.rounds)
 
 
 mm_plugin.map_to_openapi_type(Password, "string", "password")
@@ -437,11 +637,9 @@ class Cidr(String):
         self.error_messages["validator_failed"] = error_msg(FIELD_CIDR)
 
     def post_deserialize(self, value, attr, obj, **kwargs):
-        try:
-            IPNetwork(value)
-            return value
-        except AddrFormatError:
+        if not memoize("Cidr", validate_cidr, value):
             raise self.make_error("validator_failed")
+        return value
 
 
 class Phone(String):
@@ -450,7 +648,7 @@ class Phone(String):
         self.error_messages["validator_failed"] = error_msg(FIELD_PHONE)
 
     def post_deserialize(self, value, attr, obj, **kwargs):
-        output = validate_phone(value, self.min_length)
+        output = memoize("Phone", validate_phone, value, self.min_length)
         if not output:
             raise self.make_error("validator_failed")
         return output
@@ -464,11 +662,9 @@ class Rrule(String):
 
     def post_deserialize(self, value, attr, obj, **kwargs):
         value = value.replace("SECONDLY", "HOURLY").replace("MINUTELY", "HOURLY")
-        try:
-            rrulestr(value)
-            return value
-        except BaseException:
+        if not memoize("Rrule", validate_rrule, value):
             raise self.make_error("validator_failed")
+        return value
 
 
 class ParseQueryString(String):
@@ -476,20 +672,23 @@ class ParseQueryString(String):
         try:
             r = parse_qs(attr + "=" + value, strict_parsing=True)
             output = decode_json(r[attr][0])
-            if not isinstance(output, dict):
-                raise
-            return output
-        except BaseException:
+        except (KeyError, ValueError):
             raise self.make_error("validator_failed")
+        if not isinstance(output, dict):
+            raise self.make_error("validator_failed")
+        return output
 
 
 class Date(String):
     def __init__(self, iso_format=True, *args, **kwargs):
         super(Date, self).__init__(*args, **kwargs)
         self.iso_format = iso_format
+        self.error_messages["validator_failed"] = error_msg(FIELD_DATE)
+        self.error_messages["start_end_validator_failed"] = error_msg(
+            FIELD_START_END_DATE
+        )
 
     def post_deserialize(self, value, attr, obj, **kwargs):
-        self.error_messages["validator_failed"] = error_msg(FIELD_DATE)
         return date_time(
             self,
             value,
@@ -507,9 +706,12 @@ class DateTime(String):
     def __init__(self, iso_format=False, *args, **kwargs):
         super(DateTime, self).__init__(*args, **kwargs)
         self.iso_format = iso_format
+        self.error_messages["validator_failed"] = error_msg(FIELD_DATETIME)
+        self.error_messages["start_end_validator_failed"] = error_msg(
+            FIELD_START_END_DATETIME
+        )
 
     def post_deserialize(self, value, attr, obj, **kwargs):
-        self.error_messages["validator_failed"] = error_msg(FIELD_DATETIME)
         return date_time(
             self,
             value,
@@ -523,7 +725,12 @@ mm_plugin.map_to_openapi_type(DateTime, "string", "date-time")
 
 
 class Domain(String):
-    def __init__(self, *args, **kwargs):
+    # DomainResolver used by every Domain field, defaults to the shared one
+    resolver = None
+
+    def __init__(self, *args, resolver=None, **kwargs):
+        if resolver is not None:
+            self.resolver = resolver
         super(Domain, self).__init__(lower=True, *args, **kwargs)
         self.error_messages["validator_failed"] = error_msg(FIELD_DOMAIN)
 
@@ -532,9 +739,14 @@ class Domain(String):
             return value
         if not validators.domain(value):
             raise self.make_error("validator_failed")
-        try:
-            socket.gethostbyname(value)
-        except socket.gaierror:
+        if defer_check(self.async_post_deserialize, value):
+            return value
+        if not (self.resolver or domain_resolver()).exists(value):
+            raise self.make_error("validator_failed")
+        return value
+
+    async def async_post_deserialize(self, value):
+        if not await (self.resolver or domain_resolver()).exists_async(value):
             raise self.make_error("validator_failed")
         return value
 
@@ -548,7 +760,7 @@ class Email(String):
         self.error_messages["validator_failed"] = error_msg(FIELD_EMAIL)
 
     def post_deserialize(self, value, attr, obj, **kwargs):
-        output = validate_email(value, min_length=None)
+        output = memoize("Email", validate_email, value)
         if not output:
             raise self.make_error("validator_failed")
         return output
@@ -565,7 +777,7 @@ class Url(String):
     def post_deserialize(self, value, attr, obj, **kwargs):
         if not self.min_length and value == "":
             return value
-        if not validators.url(value):
+        if not memoize("Url", validate_url, value):
             raise self.make_error("validator_failed")
         return value
 
@@ -591,37 +803,63 @@ class Dict(Fields, fields.Dict):
 mm_plugin.map_to_openapi_type(Dict, "object", None)
 
 
+@lru_cache(maxsize=None)
+def jsonschema_meta_validator():
+    """Return the validator of the Draft 7 meta-schema, built once"""
+    cls = jsonschema.Draft7Validator
+    return cls(cls.META_SCHEMA, format_checker=cls.FORMAT_CHECKER)
+
+
+def check_jsonschema(value):
+    """Return a Draft7Validator of value, None if value is not a valid schema"""
+    key = hashlib.sha256(
+        json.dumps(value, sort_keys=True, separators=(",", ":")).encode()
+    ).digest()
+    validator = checked_jsonschemas.get(key, checked_jsonschemas.missing)
+    if validator is checked_jsonschemas.missing:
+        validator = None
+        if jsonschema_meta_validator().is_valid(value):
+            validator = jsonschema.Draft7Validator(value)
+        checked_jsonschemas.set(key, validator)
+    return validator
+
+
 class JsonSchema(Dict):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, compiled=False, **kwargs):
+        # return a Draft7Validator of the schema instead of the dict
+        self.compiled = compiled
         super(JsonSchema, self).__init__(*args, **kwargs)
         self.error_messages["validator_failed"] = error_msg(FIELD_JSONSCHEMA)
 
     def post_deserialize(self, value, attr, obj, **kwargs):
+        if not all(value.values()):
+            raise self.make_error("validator_failed")
+        value = dict(value)
+        value["$schema"] = "http://json-schema.org/schema#"
         try:
-            for i in list(value.values()):
-                if not i:
-                    raise BaseException
-            value["$schema"] = "http://json-schema.org/schema#"
-            Draft7Validator.check_schema(value)
-            return value
-        except BaseException:
+            validator = check_jsonschema(value)
+        except (TypeError, ValueError):
+            validator = None
+        if validator is None:
             raise self.make_error("validator_failed")
+        return validator if self.compiled else value
 
 
 class Username(String):
     def __init__(self, *args, **kwargs):
         super(Username, self).__init__(lower=True, *args, **kwargs)
         self.error_messages["validator_failed"] = error_msg(FIELD_USERNAME)
+        self.error_messages["email_validator_failed"] = error_msg(FIELD_EMAIL)
+        self.error_messages["phone_validator_failed"] = error_msg(FIELD_PHONE)
 
     def post_deserialize(self, value, attr, obj, **kwargs):
-        output, output_type = validate_username(value, self.min_length)
-
-        if output_type == "email":
-            self.error_messages["validator_failed"] = error_msg(FIELD_EMAIL)
-        elif output_type == "phone":
-            self.error_messages["validator_failed"] = error_msg(FIELD_PHONE)
+        output, output_type = memoize(
+            "Username", validate_username, value, self.min_length
+        )
 
         if not output:
+            if output_type:
+                raise self.make_error(output_type + "_validator_failed")
             raise self.make_error("validator_failed")
 
         return output
@@ -658,14 +896,67 @@ class List(Fields, fields.List):
             raise self.make_error("max_length")
         if isinstance(value, str):
             value = value.split(",")
-
-        value = list(value)
+        elif type(value) is not list:
+            value = list(value)
 
         if self.remove_duplicates:
-            value = list(unique_everseen(value, key=self.duplicate_callable))
+            value = self.unique(value)
 
+        result = self.bulk_deserialize(value)
+        if result is not None:
+            return result
         return fields.List._deserialize(self, value, attr, data, **kwargs)
 
+    def unique(self, value):
+        """Return value without duplicates, keeping the first of each"""
+        if self.duplicate_callable is None:
+            try:
+                return list(dict.fromkeys(value))
+            except TypeError:
+                pass
+        return list(unique_everseen(value, key=self.duplicate_callable))
+
+    def bulk_deserialize(self, value):
+        """Deserialize value at once for plain Integer, Float and String inner
+        fields, None when the elements must go through the inner field"""
+        inner = self.inner
+        kind = type(inner)
+        if kind not in (Integer, Float, String) or inner.validators:
+            return None
+        if getattr(inner, "post_validate", None):
+            return None
+        types = set(map(type, value))
+        try:
+            if kind is Integer and types <= {int}:
+                # int64 array, larger numbers raise OverflowError
+                values = array("q", value)
+                if values and (
+                    (inner.min_length and min(values) < inner.min_length)
+                    or (inner.max_length and max(values) > inner.max_length)
+                ):
+                    return None
+                return values.tolist()
+            if kind is Float and types <= {int, float}:
+                values = array("d", value)
+                if inner.allow_nan is False and not all(map(math.isfinite, values)):
+                    return None
+                return values.tolist()
+        except OverflowError:
+            return None
+        if kind is String and types <= {str} and not inner.friendly_name:
+            values = list(map(str.strip, value))
+            if values and (
+                min(map(len, values)) < inner.min_length
+                or max(map(len, values)) > inner.max_length
+            ):
+                return None
+            if inner.lower:
+                values = list(map(str.lower, values))
+            if inner.capitalize:
+                values = list(map(str.capitalize, values))
+            return values
+        return None
+
     def post_deserialize(self, value, attr, data, **kwargs):
         if self.min_length == 0 and not value:
             return None
@@ -678,7 +969,11 @@ mm_plugin.map_to_openapi_type(List, "array", None)
 class Set(List):
     def __init__(self, cls_or_instance, min_length=1, max_length=20000, **kwargs):
         super(Set, self).__init__(
-            cls_or_instance, True, min_length, max_length, **kwargs
+            cls_or_instance,
+            min_length=min_length,
+            max_length=max_length,
+            remove_duplicates=True,
+            **kwargs,
         )
 
     def post_deserialize(self, value, attr, data, **kwargs):
@@ -690,7 +985,7 @@ class Set(List):
 mm_plugin.map_to_openapi_type(Set, "array", None)
 
 
-class Boolean(fields.Boolean):
+class Boolean(FailFast, fields.Boolean):
     def __init__(self, *args, **kwargs):
         kwargs.setdefault("error_messages", default_error_messages())
         super(Boolean, self).__init__(*args, **kwargs)
@@ -737,7 +1032,7 @@ class FutureTimestamp(Integer):
 mm_plugin.map_to_openapi_type(FutureTimestamp, "integer", "int32")
 
 
-class Float(fields.Float):
+class Float(FailFast, fields.Float):
     def __init__(self, *args, **kwargs):
         kwargs.setdefault("error_messages", default_error_messages())
         super(Float, self).__init__(*args, **kwargs)
@@ -771,7 +1066,7 @@ class ContainsOnly(validate.ContainsOnly):
         super(ContainsOnly, self).__init__(*args, **kwargs)
 
 
-class Function(fields.Field):
+class Function(FailFast, fields.Field):
     def __init__(
         self,
         serialize=None,
@@ -840,13 +1135,43 @@ class DynamicNested(Nested):
         self.key_type = key_type
         self.nested_schema = Nested(nested, unknown=INCLUDE)
 
+    def main_deserialize(self, value, attr, obj, **kwargs):
+        # entries are loaded by post_deserialize, not as one nested object
+        if self.allow_empty and not value:
+            return value
+        if not isinstance(value, Mapping):
+            raise self.make_error("invalid")
+        return value
+
     def post_deserialize(self, value, attr, obj, **kwargs):
-        ret = {}
-        for key, val in value.items():
-            k = self.key_type.deserialize(key, key, obj)
-            v = self.nested_schema.deserialize(val, key, obj)
-            ret[k] = v
-        return ret
+        if not value:
+            return value
+        errors = {}
+        keys = []
+        for key in value:
+            try:
+                keys.append(self.key_type.deserialize(key, key, obj))
+            except ValidationError as error:
+                keys.append(None)
+                errors[key] = {"key": error.messages}
+
+        # every value in a single load of the nested schema
+        try:
+            values = self.schema.load(
+                list(value.values()),
+                many=True,
+                unknown=INCLUDE,
+                partial=kwargs.get("partial"),
+            )
+        except ValidationError as error:
+            values = None
+            for index, key in enumerate(value):
+                if index in error.messages:
+                    errors.setdefault(key, {})["value"] = error.messages[index]
+
+        if errors:
+            raise ValidationError(errors)
+        return dict(zip(keys, values))
 
     def post_serialize(self, value, attr, obj, **kwargs):
         ret = {}
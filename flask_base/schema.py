@@ -1,89 +1,336 @@
-from flask import request, g
+import asyncio
+import inspect
+import re
+from functools import lru_cache
+
+from flask import current_app, request, g
 from marshmallow import EXCLUDE, ValidationError
+from werkzeug.exceptions import RequestEntityTooLarge
 
 import flask_base.exceptions as excepts
-from flask_base.utils import function_args, http_path, find_schemas
+from flask_base.hashing import hash_pending, pending_hashes
+from flask_base.mmallow import (
+    deferred_checks,
+    deferred_results,
+    fail_fast_errors,
+    parsed_dates,
+)
+from flask_base.timing import phase
+from flask_base.utils import view_function_args, http_path, find_schemas
+
+validation_plans = {}
+
+# view attribute of each payload limit and the app config used when None
+payload_limit_configs = {
+    "max_body_size": "MAX_BODY_SIZE",
+    "max_json_depth": "MAX_JSON_DEPTH",
+    "max_json_keys": "MAX_JSON_KEYS",
+}
+json_string_pattern = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+json_start_pattern = re.compile(rb"\s*[\[{]")
+# translate arguments keeping only brackets, arrays become objects
+json_brackets = bytes.maketrans(b"[]", b"{}")
+json_non_brackets = bytes(range(256)).translate(None, b"[]{}")
+json_whitespace = b" \t\n\r"
+
+
+def check_payload(limits, class_name):
+    """Reject a body over the size, json depth or key count limits"""
+    max_size = limits.get("max_body_size")
+    max_depth = limits.get("max_json_depth")
+    max_keys = limits.get("max_json_keys")
+    if max_size is not None and (request.content_length or 0) > max_size:
+        raise payload_error("Request body is too large", class_name)
+    if max_size is None and max_depth is None and max_keys is None:
+        return
+
+    # content length is unknown for chunked bodies, werkzeug stops reading
+    # them at the request max_content_length, settable since Flask 3.1, one
+    # byte over max_size is enough
+    limit = request.max_content_length
+    if max_size is not None and (limit is None or limit > max_size + 1):
+        request.max_content_length = max_size + 1
+    try:
+        data = request.get_data(cache=True)
+    except RequestEntityTooLarge:
+        raise payload_error("Request body is too large", class_name)
+    if max_size is not None and len(data) > max_size:
+        raise payload_error("Request body is too large", class_name)
+    if not json_start_pattern.match(data):
+        return
+
+    # bodies with fewer colons or brackets than the limits need no scan
+    if max_keys is not None and data.count(b":") <= max_keys:
+        max_keys = None
+    if max_depth is not None and data.count(b"{") + data.count(b"[") <= max_depth:
+        max_depth = None
+    if max_keys is None and max_depth is None:
+        return
+
+    # empty the strings of the raw json, they can not hide brackets or colons
+    if b"\\" in data:
+        data = json_string_pattern.sub(b'""', data)
+    else:
+        data = b'""'.join(data.split(b'"')[::2])
+    if max_keys is not None:
+        if data.translate(None, json_whitespace).count(b'"":') > max_keys:
+            raise payload_error("Request body has too many keys", class_name)
+    if max_depth is not None:
+        # each pass removes the innermost objects and arrays
+        data = data.translate(json_brackets, json_non_brackets)
+        for _ in range(max_depth):
+            if b"{}" not in data:
+                break
+            data = data.replace(b"{}", b"")
+        else:
+            if data:
+                raise payload_error("Request body is nested too deeply", class_name)
+
+
+def payload_error(message, class_name):
+    return excepts.Body({"_schema": [message]}, class_name)
+
+
+class IncomingData(dict):
+    """Request data by location, each location is read on first access"""
+
+    def __init__(self, limits=None, class_name=""):
+        super(IncomingData, self).__init__()
+        self.limits = limits or {}
+        self.class_name = class_name
+
+    def __missing__(self, location):
+        with phase("parse"):
+            if location == "body":
+                check_payload(self.limits, self.class_name)
+                value = request.get_json(True, True) or request.form
+            elif location == "query":
+                value = request.args
+            elif location == "header":
+                value = {
+                    key.lower().replace("-", "_"): val
+                    for key, val in request.headers
+                }
+            elif location == "view_arg":
+                value = dict(request.view_args)
+            else:
+                raise KeyError(location)
+        self[location] = value
+        return value
 
 
 def incoming_data(location):
-    header = {
-        key.lower().replace("-", "_"): val for key, val in request.headers
-    }
-    incoming = {
-        "body": request.get_json(True, True) or request.form,
-        "query": request.args,
-        "header": header,
-        "view_arg": dict(request.view_args),
-    }
-    return incoming[location]
-
-
-def load_schemas(path, data, schemas, class_name):
-    """Load and validate parent and child schema"""
+    if not isinstance(g.get("incoming_data"), IncomingData):
+        g.incoming_data = IncomingData()
+    return g.incoming_data[location]
+
+
+@lru_cache(maxsize=None)
+def schema_instance(schema, unknown=EXCLUDE):
+    """Return a shared instance of schema, fields are bound only once"""
+    return schema(unknown=unknown)
+
+
+def load_schemas(path, data, schemas, class_name, fail_fast=False):
+    """Load and validate parent and child schema
+
+    In fail fast mode fields after the first error are skipped and only
+    the first error is raised.
+    """
     schemas_data = {}
     schemas_errors = {}
-    for schema in schemas:
-        try:
-            output = schema().load(data, unknown=EXCLUDE)
-            schemas_data.update(output)
-        except ValidationError as err:
-            schemas_errors.update(err.messages)
+    failed = [] if fail_fast else None
+    token = fail_fast_errors.set(failed)
+    dates_token = parsed_dates.set({})
+    try:
+        for schema in schemas:
+            try:
+                output = schema_instance(schema).load(data)
+                schemas_data.update(output)
+            except ValidationError as err:
+                if fail_fast:
+                    raise location_exception(path)(
+                        first_error(err.messages), class_name
+                    )
+                schemas_errors.update(err.messages)
+            if failed:
+                # an error was caught inside a field, fields were skipped
+                raise location_exception(path)(dict(failed[:1]), class_name)
+    finally:
+        parsed_dates.reset(dates_token)
+        fail_fast_errors.reset(token)
     if schemas_errors:
-        expectation = getattr(excepts, path.title().replace("_", ""))
-        raise expectation(schemas_errors, class_name)
+        raise location_exception(path)(schemas_errors, class_name)
     return schemas_data
 
 
+def first_error(messages):
+    """Return only the first error of marshmallow error messages"""
+    if isinstance(messages, dict) and messages:
+        key, value = next(iter(messages.items()))
+        return {key: first_error(value)}
+    return messages
+
+
+def location_exception(path):
+    return getattr(excepts, path.title().replace("_", ""))
+
+
+class ValidationPlan:
+    """Arguments, schemas and post validate hooks of a view method"""
+
+    def __init__(self, view_class, method):
+        request_method = getattr(view_class, method.lower())
+        view_func_args = view_function_args(view_class, request_method)
+        # (arg, schemas) in argument order, schemas is None for non http_path
+        self.locations = [
+            (
+                arg,
+                find_schemas(method.title(), view_class.schema, path=arg)
+                if arg in http_path
+                else None,
+            )
+            for arg in view_func_args
+        ]
+        self.local_args = {
+            arg
+            for arg, val in view_func_args.items()
+            if val.get("scope") == "local"
+        }
+        self.post_validators = [
+            schema.post_validate
+            for schema in find_schemas(method.title(), view_class.schema)
+            if hasattr(schema, "post_validate")
+        ]
+        self.class_name = view_class.__name__
+        # None uses the VALIDATION_FAIL_FAST app config
+        self.fail_fast = getattr(view_class, "fail_fast", None)
+        self.payload_limits = {
+            name: getattr(view_class, name, None) for name in payload_limit_configs
+        }
+        # await validators doing I/O concurrently for async views
+        self.async_checks = getattr(
+            view_class, "async_validation", False
+        ) or inspect.iscoroutinefunction(request_method)
+
+
+def validation_plan(view_class, method):
+    """Return the cached validation plan of a view method, build on first use"""
+    key = (view_class, method)
+    plan = validation_plans.get(key)
+    if plan is None:
+        plan = validation_plans[key] = ValidationPlan(view_class, method)
+    return plan
+
+
+async def run_deferred_checks(checks):
+    """Await deferred validators of all locations, return the ValidationError
+    or None of each by key"""
+    results = await asyncio.gather(
+        *[func() for _, _, func in checks], return_exceptions=True
+    )
+    errors = {}
+    for (_, key, _), result in zip(checks, results):
+        if isinstance(result, ValidationError):
+            errors[key] = result
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            errors[key] = None
+    return errors
+
+
+def raise_deferred_errors(location, data, schemas, class_name, errors, fail_fast):
+    """Load location again with the results of its deferred validators, the
+    errors raised are those of views validating synchronously
+
+    Passwords are not hashed again, the data loaded is never used.
+    """
+    token = deferred_results.set(errors)
+    hashes_token = pending_hashes.set([])
+    try:
+        load_schemas(location, data, schemas, class_name, fail_fast)
+    finally:
+        pending_hashes.reset(hashes_token)
+        deferred_results.reset(token)
+    # the error was caught by an enclosing field
+    error = next(error for error in errors.values() if error is not None)
+    raise location_exception(location)({"_schema": error.messages}, class_name)
+
+
 def validate_schema(view_func):
     def wrapper(*args, **kwargs):
 
         """For each incoming data given, load and validate"""
         g.processed_data = {}
-        g.incoming_data = {}
-
-        request_method = getattr(view_func.view_class, request.method.lower())
-        view_func_args = function_args(request_method)
-
-        # add global arg if global args exist in class
-        if hasattr(view_func.view_class, "global_args"):
-            for arg in view_func.view_class.global_args:
-                if arg not in view_func_args:
-                    view_func_args[arg] = view_func.view_class.global_args[arg]
-                    view_func_args[arg]["scope"] = "global"
-
-        # store unprocessed incoming data
-        for arg in view_func_args:
-            if arg in http_path:
-                g.incoming_data[arg] = incoming_data(arg)
+
+        plan = validation_plan(view_func.view_class, request.method)
+        limits = {}
+        for name, config in payload_limit_configs.items():
+            limit = plan.payload_limits[name]
+            limits[name] = current_app.config.get(config) if limit is None else limit
+        g.incoming_data = IncomingData(limits, plan.class_name)
+        fail_fast = plan.fail_fast
+        if fail_fast is None:
+            fail_fast = current_app.config.get("VALIDATION_FAIL_FAST", False)
+        checks = []
+        loaded = {}
+        hashes = []
+
         # process incoming data
-        for arg in view_func_args:
-            # set non http_path to none for now
-            if arg not in http_path:
-                g.processed_data[arg] = None
-                continue
-
-            # get data from request
-            # find schemas for request
-            # validate schemas
-
-            data = incoming_data(arg)
-            if arg == "view_arg" and hasattr(
-                g, "view_args"
-            ):  # check for url processors
-                data.update(g.view_args)
-            schemas = find_schemas(
-                request.method.title(), view_func.view_class.schema, path=arg
-            )
-            g.processed_data[arg] = load_schemas(
-                arg, data, schemas, view_func.view_class.__name__
-            )
+        hashes_token = pending_hashes.set(hashes)
+        try:
+            for arg, schemas in plan.locations:
+                # set non http_path to none for now
+                if schemas is None:
+                    g.processed_data[arg] = None
+                    continue
+
+                # get data from request
+                # validate schemas
+
+                data = incoming_data(arg)
+                if arg == "view_arg" and hasattr(
+                    g, "view_args"
+                ):  # check for url processors, keep stored data unprocessed
+                    data = dict(data, **g.view_args)
+                if plan.async_checks:
+                    deferred = []
+                    token = deferred_checks.set(deferred)
+                    try:
+                        with phase("load." + arg):
+                            g.processed_data[arg] = load_schemas(
+                                arg, data, schemas, plan.class_name, fail_fast
+                            )
+                    finally:
+                        deferred_checks.reset(token)
+                    checks.extend((arg, key, func) for key, func in deferred)
+                    loaded[arg] = data, schemas
+                else:
+                    with phase("load." + arg):
+                        g.processed_data[arg] = load_schemas(
+                            arg, data, schemas, plan.class_name, fail_fast
+                        )
+        finally:
+            pending_hashes.reset(hashes_token)
+
+        # await validators doing I/O of all locations at once
+        if checks:
+            errors = current_app.ensure_sync(run_deferred_checks)(checks)
+            for arg, key, _ in checks:
+                if errors[key] is not None:
+                    raise_deferred_errors(
+                        arg, *loaded[arg], plan.class_name, errors, fail_fast
+                    )
 
         # process post validate
-        for schema in find_schemas(
-            request.method.title(), view_func.view_class.schema
-        ):
-            if hasattr(schema, "post_validate"):
-                g.processed_data = schema.post_validate(g.processed_data)
+        with phase("post_validate"):
+            for post_validate in plan.post_validators:
+                g.processed_data = post_validate(g.processed_data)
+
+        # hash deferred passwords now that the whole request is valid
+        if hashes:
+            hash_pending(g.processed_data, hashes)
 
         # pass validated url variable overriding non http_path
         if "view_arg" in g.processed_data:
@@ -91,11 +338,9 @@ def validate_schema(view_func):
 
         # update function with requested data
         for arg in g.processed_data:
-            if (
-                arg in view_func_args
-                and view_func_args[arg]["scope"] == "local"
-            ):
+            if arg in plan.local_args:
                 kwargs[arg] = g.processed_data[arg]
-        return view_func(*args, **kwargs)
+        with phase("handler"):
+            return view_func(*args, **kwargs)
 
     return wrapper
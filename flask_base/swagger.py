@@ -1,18 +1,24 @@
+import hashlib
+import json
+import threading
 from collections.abc import Mapping
-from copy import deepcopy
+from functools import wraps
 
 import yaml
 from apispec import APISpec
 from apispec.ext.marshmallow import MarshmallowPlugin
 from apispec_webframeworks.flask import FlaskPlugin
+from flask import current_app, request
+from marshmallow import Schema
 
+from flask_base.jsonstyle import encode, json_default
 from flask_base.utils import (
-    function_args,
+    view_function_args,
     http_path,
     find_schemas,
     http_methods,
+    logger,
 )
-from py_tools.format import dumps, loads
 
 mm_plugin = MarshmallowPlugin()
 flask_plugin = FlaskPlugin()
@@ -24,6 +30,197 @@ api_spec = APISpec(
     plugins=(mm_plugin, flask_plugin),
 )
 
+# definitions of each schema class, the schema itself is named schema_token
+schema_definitions_cache = {}
+schema_token = "__schema__"
+
+# view classes waiting for generate_swagger, docs are built on first use
+pending_views = []
+pending_lock = threading.Lock()
+
+
+def plain(obj):
+    """Convert apispec output to plain json types"""
+    if isinstance(obj, Mapping):
+        return {key: plain(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [plain(value) for value in obj]
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    try:
+        return json_default(obj)
+    except TypeError:
+        return str(obj)
+
+
+def schema_definitions(schema):
+    """Return the definitions of schema and its nested schemas"""
+    definitions = schema_definitions_cache.get(schema)
+    if definitions is None:
+        # field type mappings of mm_plugin are shared by every plugin
+        spec = APISpec(
+            title="",
+            version="1.0.0",
+            openapi_version="2.0",
+            plugins=(MarshmallowPlugin(),),
+        )
+        spec.components.schema(schema_token, schema=schema)
+        definitions = plain(spec.to_dict()["definitions"])
+        schema_definitions_cache[schema] = definitions
+    return definitions
+
+
+def register_swagger(cls):
+    """Queue cls for generate_swagger"""
+    with pending_lock:
+        if cls not in pending_views:
+            pending_views.append(cls)
+
+
+def generate_pending_swagger():
+    """Run generate_swagger for every queued view class"""
+    with pending_lock:
+        while pending_views:
+            generate_swagger(pending_views.pop(0))
+
+
+def schema_signature(schema, seen):
+    """Describe the declared fields of schema"""
+    name = schema.__module__ + "." + schema.__qualname__
+    if schema in seen:
+        return name
+    seen.add(schema)
+    return [name] + [
+        [key, field_signature(field, seen)]
+        for key, field in sorted(schema._declared_fields.items())
+    ]
+
+
+def field_signature(field, seen):
+    signature = [
+        type(field).__name__,
+        field.required,
+        field.allow_none,
+        field.data_key,
+        field.metadata,
+        [getattr(v, "choices", type(v).__name__) for v in field.validators],
+    ]
+    nested = getattr(field, "nested", None)
+    if isinstance(nested, Schema):
+        nested = type(nested)
+    if isinstance(nested, type):
+        signature.append(schema_signature(nested, seen))
+    inner = getattr(field, "inner", None)
+    if inner is not None:
+        signature.append(field_signature(inner, seen))
+    return signature
+
+
+def stable(obj):
+    """Convert obj to json types that are the same in every process"""
+    if isinstance(obj, Mapping):
+        return {str(key): stable(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [stable(value) for value in obj]
+    if isinstance(obj, (set, frozenset)):
+        # set order depends on the hash seed of the process
+        values = [stable(value) for value in obj]
+        return sorted(values, key=lambda value: json.dumps(value, sort_keys=True))
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    if hasattr(obj, "__qualname__"):
+        return getattr(obj, "__module__", "") + "." + obj.__qualname__
+    text = str(obj)
+    if " at 0x" in text:
+        # the default repr has the memory address, only the type is stable
+        return stable(type(obj))
+    return text
+
+
+def spec_fingerprint(app):
+    """Hash the routes, docstrings and schemas the view docs are built from"""
+    views = []
+    for rule in sorted(app.url_map.iter_rules(), key=lambda r: (r.rule, r.endpoint)):
+        cls = getattr(app.view_functions.get(rule.endpoint), "view_class", None)
+        if not hasattr(cls, "schema"):
+            continue
+        for http_method in [attr for attr in dir(cls) if attr in http_methods]:
+            view_func = getattr(cls, http_method)
+            seen = set()
+            schemas = [
+                schema_signature(schema, seen)
+                for arg in view_function_args(cls, view_func)
+                if arg in http_path
+                for schema in find_schemas(http_method.title(), cls.schema, path=arg)
+            ]
+            views.append(
+                [
+                    rule.rule,
+                    sorted(rule.methods),
+                    cls.__module__ + "." + cls.__qualname__,
+                    http_method,
+                    getattr(cls, "tags", []),
+                    view_func.__doc__,
+                    schemas,
+                ]
+            )
+    views = json.dumps(stable(views), sort_keys=True)
+    return hashlib.sha256(views.encode()).hexdigest()
+
+
+def export_swagger(app, path):
+    """Generate the docs of every view and write the specs to a snapshot"""
+    fingerprint = spec_fingerprint(app)
+    generate_pending_swagger()
+    with app.test_request_context():
+        specs = {
+            spec["endpoint"]: app.swag.get_apispecs(spec["endpoint"])
+            for spec in app.swag.config["specs"]
+        }
+    with open(path, "w") as f:
+        json.dump(
+            {"fingerprint": fingerprint, "specs": specs}, f, sort_keys=True, default=str
+        )
+    return fingerprint
+
+
+def snapshot_specs(app):
+    """Return the specs of the app snapshot if it matches the current views"""
+    path = app.config.get("SWAGGER_SNAPSHOT")
+    if not path:
+        return None
+    snapshot = app.extensions.get("swagger_snapshot")
+    if snapshot is None:
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            logger.warning("Failed to load swagger snapshot: %s", path)
+            snapshot = {}
+        if snapshot and snapshot.get("fingerprint") != spec_fingerprint(app):
+            logger.warning("Swagger snapshot is out of date: %s", path)
+            snapshot = {}
+        app.extensions["swagger_snapshot"] = snapshot
+    return snapshot.get("specs")
+
+
+def swagger_view(view):
+    """Decorate flasgger views to serve the snapshot or generate docs first"""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        specs = snapshot_specs(current_app)
+        endpoint = request.endpoint.rsplit(".", 1)[-1]
+        if specs is None:
+            generate_pending_swagger()
+        elif endpoint in specs:
+            return current_app.response_class(
+                encode(specs[endpoint]), mimetype="application/json"
+            )
+        return view(*args, **kwargs)
+
+    return wrapper
+
 
 def generate_swagger(cls):
     def update_nested(orig_dict, new_dict):
@@ -40,11 +237,10 @@ def generate_swagger(cls):
 
     def generate_spec(schema):
         """Generate apispec"""
-        new_spec = deepcopy(api_spec)
-        new_spec.title = class_name
-        new_spec.version = "1.0.0"
-        new_spec.components.schema(class_name, schema=schema)
-        return loads(dumps(new_spec.to_dict()["definitions"]))
+        return {
+            class_name if name == schema_token else name: definition
+            for name, definition in schema_definitions(schema).items()
+        }
 
     def find_specs(schemas):
         """Generate apispec for parent and child schema"""
@@ -63,14 +259,7 @@ def generate_swagger(cls):
         parameters = []
         tags = getattr(cls, "tags", [])
 
-        view_func_args = function_args(view_func)
-
-        # add global arg if global args exist in class
-        if hasattr(cls, "global_args"):
-            for arg in cls.global_args:
-                if arg not in view_func_args:
-                    view_func_args[arg] = cls.global_args[arg]
-                    view_func_args[arg]["scope"] = "global"
+        view_func_args = view_function_args(cls, view_func)
 
         for arg, val in {
             arg: val for arg, val in view_func_args.items() if arg in http_path
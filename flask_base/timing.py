@@ -0,0 +1,88 @@
+import time
+from contextvars import ContextVar
+
+from flask import g
+
+# dict of phase name to seconds, set during requests of apps with timing
+request_timings = ContextVar("request_timings", default=None)
+
+
+class Phase:
+    """Add the time spent in the with block to the request timings"""
+
+    __slots__ = ("timings", "name", "start")
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        self.timings[self.name] = self.timings.get(self.name, 0.0) + elapsed
+
+
+class NullPhase:
+    """Phase of requests without timing, does nothing"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+null_phase = NullPhase()
+
+
+def phase(name):
+    """Return a context manager timing the named phase of the request"""
+    timings = request_timings.get()
+    if timings is None:
+        return null_phase
+    return Phase(timings, name)
+
+
+def server_timing(timings):
+    """Format timings as a Server-Timing header value"""
+    return ", ".join(
+        "%s;dur=%.3f" % (name, seconds * 1000) for name, seconds in timings.items()
+    )
+
+
+def init_timing(app, header=True, hook=None):
+    """Time the phases of every request of app
+
+    With header the timings are sent in a Server-Timing header, hook is
+    called with the timings in milliseconds and the response.
+    """
+
+    @app.before_request
+    def start_timing():
+        g.timing_start = time.perf_counter()
+        g.timing_token = request_timings.set({})
+
+    @app.after_request
+    def send_timing(response):
+        timings = request_timings.get()
+        if timings is None or "timing_start" not in g:
+            return response
+        timings["total"] = time.perf_counter() - g.timing_start
+        if header:
+            response.headers["Server-Timing"] = server_timing(timings)
+        if hook:
+            hook({name: seconds * 1000 for name, seconds in timings.items()}, response)
+        return response
+
+    @app.teardown_request
+    def stop_timing(exc):
+        token = g.pop("timing_token", None)
+        if token is not None:
+            request_timings.reset(token)
+
+    return app
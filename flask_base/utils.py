@@ -2,7 +2,10 @@ import importlib
 import traceback
 import pkgutil
 import inspect
+import threading
+import time
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 from apispec.ext.marshmallow import openapi
 from flask import request
@@ -30,6 +33,93 @@ class OpenAPIConverter2(openapi.OpenAPIConverter):
         super().__init__(openapi_version, schema_name_resolver, spec)
 
 
+class TTLCache:
+    """Thread safe LRU cache, entries expire ttl seconds after being set"""
+
+    missing = object()
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            value, expires = self.data.get(key, (self.missing, None))
+            if value is not self.missing and expires and expires <= time.monotonic():
+                del self.data[key]
+                value = self.missing
+            if value is self.missing:
+                self.misses += 1
+                return default
+            self.data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        with self.lock:
+            self.data[key] = value, time.monotonic() + ttl if ttl else None
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def add(self, key, value, ttl=None):
+        """Set key only if missing or expired, return True if it was set"""
+        ttl = self.ttl if ttl is None else ttl
+        with self.lock:
+            _, expires = self.data.get(key, (None, 0))
+            if expires is None or expires > time.monotonic():
+                return False
+            self.data[key] = value, time.monotonic() + ttl if ttl else None
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+            return True
+
+    def pop(self, key, default=None):
+        with self.lock:
+            value, _ = self.data.pop(key, (default, None))
+            return value
+
+    def __contains__(self, key):
+        return self.get(key, self.missing) is not self.missing
+
+    def __len__(self):
+        return len(self.data)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+class LazyModule:
+    """Module proxy importing the module on first attribute access"""
+
+    def __init__(self, name):
+        self.__name = name
+        self.__module = None
+        self.__lock = threading.Lock()
+
+    def __getattr__(self, attr):
+        if self.__module is None:
+            with self.__lock:
+                if self.__module is None:
+                    self.__module = importlib.import_module(self.__name)
+        value = getattr(self.__module, attr)
+        # later lookups find the attribute without calling __getattr__
+        setattr(self, attr, value)
+        return value
+
+    def __repr__(self):
+        return "<lazy module %r>" % self.__name
+
+
 def function_args(func):
     """Return key:map of  functions args and meta data about args"""
     response = OrderedDict()
@@ -53,6 +143,15 @@ def function_args(func):
     return response
 
 
+def view_function_args(view_class, func):
+    """Return function_args of a view method merged with the class global args"""
+    response = function_args(func)
+    for arg, val in getattr(view_class, "global_args", {}).items():
+        if arg not in response:
+            response[arg] = dict(val, scope="global")
+    return response
+
+
 def find_schemas(method, schema, path=None):
     path = path.title().replace("_", "") if path else path
     schemas = []
@@ -103,9 +202,54 @@ def generate_cookie(
     return cookie
 
 
-def import_submodules(package, recursive=True):
+def import_module_tree(full_name, is_pkg, recursive):
+    """Import a module and, for a package, its submodules"""
+    results = {}
+    report = []
+    start = time.perf_counter()
+    error = None
+    try:
+        results[full_name] = importlib.import_module(full_name)
+    except BaseException:
+        error = traceback.format_exc()
+        logger.critical("Failed to import: %s", full_name)
+        logger.critical(error)
+    report.append(
+        {"module": full_name, "seconds": time.perf_counter() - start, "error": error}
+    )
+    if recursive and is_pkg and error is None:
+        sub_results, sub_report = import_submodules(full_name, report=True)
+        results.update(sub_results)
+        report.extend(sub_report)
+    return results, report
+
+
+def log_import_report(report):
+    """Log the import report as a table, slowest module first"""
+    lines = ["%10s  %s" % ("seconds", "module")]
+    for row in sorted(report, key=lambda row: row["seconds"], reverse=True):
+        lines.append(
+            "%10.4f  %s%s"
+            % (row["seconds"], row["module"], "  FAILED" if row["error"] else "")
+        )
+    logger.info("Import report\n%s", "\n".join(lines))
+
+
+def import_submodules(
+    package,
+    recursive=True,
+    parallel=False,
+    max_workers=None,
+    report=False,
+    log_report=False,
+):
     """Import all submodules of a module, recursively, including subpackages
 
+    With parallel the direct submodules of package, each with its own
+    subpackages, are imported on a thread pool of max_workers threads.
+    With report a list of {"module", "seconds", "error"} dicts, one per
+    imported module, is returned alongside the modules.
+
     :param package: package (name or actual module)
     :type package: str | module
     :rtype: dict[str, types.ModuleType]
@@ -113,14 +257,27 @@ def import_submodules(package, recursive=True):
 
     if isinstance(package, str):
         package = importlib.import_module(package)
+    modules = [
+        (package.__name__ + "." + name, is_pkg)
+        for loader, name, is_pkg in pkgutil.walk_packages(package.__path__)
+    ]
+
+    def import_tree(module):
+        return import_module_tree(*module, recursive)
+
+    if parallel:
+        with ThreadPoolExecutor(max_workers) as executor:
+            trees = list(executor.map(import_tree, modules))
+    else:
+        trees = [import_tree(module) for module in modules]
+
     results = {}
-    for loader, name, is_pkg in pkgutil.walk_packages(package.__path__):
-        full_name = package.__name__ + "." + name
-        try:
-            results[full_name] = importlib.import_module(full_name)
-        except BaseException:
-            logger.critical("Failed to import: %s", full_name)
-            logger.critical(traceback.format_exc())
-        if recursive and is_pkg:
-            results.update(import_submodules(full_name))
+    import_report = []
+    for tree_results, tree_report in trees:
+        results.update(tree_results)
+        import_report.extend(tree_report)
+    if log_report:
+        log_import_report(import_report)
+    if report:
+        return results, import_report
     return results
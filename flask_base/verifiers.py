@@ -0,0 +1,188 @@
+import asyncio
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from functools import partial
+
+from flask_base.exceptions import Error
+from flask_base.utils import LazyModule, TTLCache
+
+requests = LazyModule("requests")
+urllib3_retry = LazyModule("urllib3.util.retry")
+
+RECAPTCHA_VERIFY_URL = "https://www.google.com/recaptcha/api/siteverify"
+
+default_recaptcha_verifier = None
+default_domain_resolver = None
+
+
+class RecaptchaVerifier:
+    """Verify recaptcha tokens over a pooled keep-alive session
+
+    Every token verified by siteverify is remembered for token_ttl seconds,
+    a replayed token is rejected without a network call. url, timeout and
+    retries default to the RECAPTCHA_VERIFY_URL, RECAPTCHA_TIMEOUT and
+    RECAPTCHA_RETRIES environment variables.
+    """
+
+    def __init__(
+        self,
+        url=None,
+        timeout=None,
+        retries=None,
+        token_ttl=120,
+        max_tokens=100000,
+        pool_size=10,
+    ):
+        self.url = url or os.environ.get("RECAPTCHA_VERIFY_URL", RECAPTCHA_VERIFY_URL)
+        self.timeout = float(timeout or os.environ.get("RECAPTCHA_TIMEOUT", 5))
+        if retries is None:
+            retries = int(os.environ.get("RECAPTCHA_RETRIES", 2))
+        self.tokens = TTLCache(max_tokens, token_ttl)
+
+        # only connection failures are retried, a token can be used once
+        adapter = requests.adapters.HTTPAdapter(
+            pool_maxsize=pool_size,
+            max_retries=urllib3_retry.Retry(
+                total=retries, connect=retries, read=False, backoff_factor=0.1
+            ),
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def siteverify(self, token, secret):
+        """Return the siteverify response of token"""
+        # claimed while in flight, a concurrent replay is rejected
+        if not self.tokens.add(token, True):
+            return {"success": False, "error-codes": ["timeout-or-duplicate"]}
+        try:
+            return self.session.post(
+                self.url,
+                data={"secret": secret, "response": token},
+                timeout=self.timeout,
+            ).json()
+        except (requests.RequestException, ValueError):
+            # siteverify did not answer, the token can be sent again
+            self.tokens.pop(token)
+            return {"success": False, "error-codes": ["siteverify-unavailable"]}
+
+
+def recaptcha_verifier():
+    """Return the shared verifier, created on first use"""
+    global default_recaptcha_verifier
+    if default_recaptcha_verifier is None:
+        default_recaptcha_verifier = RecaptchaVerifier()
+    return default_recaptcha_verifier
+
+
+class DomainResolver:
+    """Check that domains resolve, with a timeout and a bounded cache
+
+    Resolving domains are cached for ttl seconds and failing ones for
+    negative_ttl seconds. resolve is called with the domain and raises
+    socket.gaierror when it does not exist, it defaults to
+    socket.gethostbyname. Concurrent checks of a domain share one lookup,
+    at most workers lookups run at once and a check finding no free worker
+    or timing out is rejected with a 503, a lookup answering late is still
+    cached. ttl, negative_ttl and timeout default to the DNS_CACHE_TTL,
+    DNS_NEGATIVE_TTL and DNS_TIMEOUT environment variables.
+    """
+
+    def __init__(
+        self,
+        resolve=None,
+        ttl=None,
+        negative_ttl=None,
+        timeout=None,
+        maxsize=10000,
+        workers=8,
+    ):
+        self.resolve = resolve or socket.gethostbyname
+        self.ttl = float(ttl or os.environ.get("DNS_CACHE_TTL", 300))
+        self.negative_ttl = float(
+            negative_ttl or os.environ.get("DNS_NEGATIVE_TTL", 30)
+        )
+        self.timeout = float(timeout or os.environ.get("DNS_TIMEOUT", 2))
+        self.cache = TTLCache(maxsize)
+        # a slot is held until the lookup returns, even after a timeout, so
+        # hung lookups never leave checks queued behind them
+        self.slots = threading.BoundedSemaphore(workers)
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="dns")
+        # in-flight lookup future by domain
+        self.lookups = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def unavailable():
+        return Error(
+            "Domain lookup is unavailable, try again later",
+            503,
+            error_type="ServiceUnavailableException",
+        )
+
+    def lookup(self, domain):
+        """Return the future of the in-flight lookup of domain, start it if none"""
+        with self.lock:
+            future = self.lookups.get(domain)
+            if future is not None:
+                return future
+            if not self.slots.acquire(blocking=False):
+                raise self.unavailable()
+            try:
+                future = self.executor.submit(self.resolve, domain)
+            except BaseException:
+                self.slots.release()
+                raise
+            self.lookups[domain] = future
+        future.add_done_callback(partial(self.finish, domain))
+        return future
+
+    def finish(self, domain, future):
+        error = future.exception()
+        if error is None:
+            self.cache.set(domain, True, self.ttl)
+        elif isinstance(error, socket.gaierror):
+            self.cache.set(domain, False, self.negative_ttl)
+        with self.lock:
+            del self.lookups[domain]
+        self.slots.release()
+
+    def exists(self, domain):
+        """Return True if domain resolves"""
+        found = self.cache.get(domain)
+        if found is not None:
+            return found
+        try:
+            self.lookup(domain).result(self.timeout)
+        except socket.gaierror:
+            return False
+        except (TimeoutError, OSError):
+            raise self.unavailable()
+        return True
+
+    async def exists_async(self, domain):
+        """Return True if domain resolves, without blocking the event loop"""
+        found = self.cache.get(domain)
+        if found is not None:
+            return found
+        try:
+            # shielded, the lookup may be shared with other checks
+            await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(self.lookup(domain))),
+                self.timeout,
+            )
+        except socket.gaierror:
+            return False
+        except (asyncio.TimeoutError, OSError):
+            raise self.unavailable()
+        return True
+
+
+def domain_resolver():
+    """Return the shared resolver, created on first use"""
+    global default_domain_resolver
+    if default_domain_resolver is None:
+        default_domain_resolver = DomainResolver()
+    return default_domain_resolver
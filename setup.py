@@ -10,7 +10,7 @@ setup(
     author_email="wobeng@yblew.com",
     description="flask base app",
     install_requires=[
-        "Flask",
+        "Flask>=3.1",
         "werkzeug",
         "marshmallow",
         "simplejson",
@@ -32,4 +32,5 @@ setup(
         "netaddr",
         "py-tools @ git+https://git@github.com/wobeng/py-tools.git@master#egg=py-tools-1.0.0",
     ],
+    extras_require={"orjson": ["orjson"], "async": ["asgiref"]},
 )